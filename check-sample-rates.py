@@ -1,34 +1,77 @@
 import os
+from lxml import etree
 from obspy import read_inventory
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+STATIONXML_NS = '{http://www.fdsn.org/xml/station/1}'
+STATION_TAG = STATIONXML_NS + 'Station'
+CHANNEL_TAG = STATIONXML_NS + 'Channel'
+SAMPLE_RATE_TAG = STATIONXML_NS + 'SampleRate'
+
+def _add_channel(results, file_path, channel_id, sample_rate):
+    if sample_rate == 0:
+        results['zero_sample_rate'].append((channel_id, file_path))
+    else:
+        results['non_zero_sample_rate'].append((channel_id, file_path, sample_rate))
+
+def _stream_stationxml(file_path, results):
+    # Read only the channel codes and sample rates, skipping the responses.
+    # Returns False if the file is not FDSN StationXML.
+    context = etree.iterparse(file_path, events=('end',), tag=(STATION_TAG, CHANNEL_TAG))
+    for _, elem in context:
+        if elem.tag == CHANNEL_TAG:
+            station = elem.getparent()
+            network = station.getparent()
+            sample_rate = elem.findtext(SAMPLE_RATE_TAG)
+            channel_id = f"{network.get('code')}.{station.get('code')}.{elem.get('locationCode', '')}.{elem.get('code')}"
+            _add_channel(results, file_path, channel_id, float(sample_rate) if sample_rate else None)
+        
+        # Drop processed elements to keep memory flat
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    
+    return context.root.tag.startswith(STATIONXML_NS)
+
+def _scan_one(file_path):
+    # Results for a single inventory file
+    results = {'zero_sample_rate': [], 'non_zero_sample_rate': [], 'errors': []}
+    # Channels are only reported once the whole file has parsed, so a
+    # truncated file shows up as an error alone
+    channels = {'zero_sample_rate': [], 'non_zero_sample_rate': []}
+    
+    try:
+        if not _stream_stationxml(file_path, channels):
+            # Not FDSN StationXML, so read it as SeisComP XML without format probing
+            inv = read_inventory(file_path, format="SC3ML")
+            
+            # Iterate through networks, stations, and channels
+            for network in inv:
+                for station in network:
+                    for channel in station:
+                        channel_id = f"{network.code}.{station.code}.{channel.location_code}.{channel.code}"
+                        _add_channel(channels, file_path, channel_id, channel.sample_rate)
+    
+    except Exception as e:
+        results['errors'].append((file_path, str(e)))
+        return results
+    
+    results.update(channels)
+    return results
 
 def check_sample_rates(folder_path):
     # Dictionary to store results
     results = defaultdict(list)
     
-    # Iterate through files in the folder
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.xml') or filename.endswith('.yaml'):  # Adjust file extensions as needed
-            file_path = os.path.join(folder_path, filename)
-            
-            try:
-                # Read the inventory
-                inv = read_inventory(file_path)
-                
-                # Iterate through networks, stations, and channels
-                for network in inv:
-                    for station in network:
-                        for channel in station:
-                            sample_rate = channel.sample_rate
-                            channel_id = f"{network.code}.{station.code}.{channel.location_code}.{channel.code}"
-                            
-                            if sample_rate == 0:
-                                results['zero_sample_rate'].append((channel_id, file_path))
-                            else:
-                                results['non_zero_sample_rate'].append((channel_id, file_path, sample_rate))
-            
-            except Exception as e:
-                results['errors'].append((file_path, str(e)))
+    paths = [os.path.join(folder_path, filename) for filename in os.listdir(folder_path)
+             if filename.endswith('.xml')]
+    
+    # Files are independent, so spread the parsing over all cores
+    with ProcessPoolExecutor() as executor:
+        for part in executor.map(_scan_one, paths, chunksize=4):
+            for key, items in part.items():
+                results[key].extend(items)
     
     return results
 
@@ -2,129 +2,275 @@ import os
 import subprocess
 import argparse
 import hashlib
+import io
 import json
+import threading
 from collections import defaultdict
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from lxml import etree
 from obspy.clients.fdsn import Client
+from obspy.clients.fdsn.header import FDSNRequestTooLargeException, FDSNTimeoutException
 from obspy import UTCDateTime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 START_DATE = UTCDateTime("2010-01-01")
 NETWORKS_TO_CHECK_NEW_STATIONS = ["2O", "3B", "AF", "AU", "IU", "II", "G", "GE", "IA", "JP", "IC", "IO"]
+MAX_WORKERS_PER_ENDPOINT = 8
+STATIONS_PER_REQUEST = 50
 
-def get_client(network):
-    fdsn_sources = {
-        "http://auspass.edu.au:80": ["M8", "S1"],
-        "https://data.raspberryshake.org": ["AM"],
-        "http://geofon.gfz-potsdam.de": ["GE"],
-        "https://geof.bmkg.go.id": ["IA"],
-        "http://seisrequest.iag.usp.br": ["BL", "BR"],
-        "http://seis-pub.ga.gov.au:8081": ["AU", "2O", "3B", "YW"],
-        "https://service.iris.edu": ["AF", "AI", "AK", "AT", "BK", "BL", "C", "C1", "CM", "CN", "CU", "EC", "EI", "GB", "GI", "GT", "HK", "HV", "IC", "II", "IM", "IN", "IO", "IU", "JP", "KG", "KZ", "MI", "MM", "MX", "MY", "NK", "NN", "NO", "ON", "OV", "PB", "PL", "PM", "PS", "PT", "RM", "TC", "TM", "TW", "US", "UW", "VU", "YC"],
-        "http://webservices.ingv.it": ["MN"],
-        "https://service.geonet.org.nz": ["NZ"],
-        "http://ws.resif.fr": ["G", "ND"]
-    }
-    
-    for base_url, networks in fdsn_sources.items():
-        if network in networks:
-            return Client(base_url)
+_state_lock = threading.Lock()
+
+NS = {'sc': 'http://geofon.gfz-potsdam.de/ns/seiscomp3-schema/0.12'}
+PARAMETER_SET_TAG = f"{{{NS['sc']}}}parameterSet"
+PARAMETER_TAG = f"{{{NS['sc']}}}parameter"
+NAME_TAG = f"{{{NS['sc']}}}name"
+VALUE_TAG = f"{{{NS['sc']}}}value"
+STATION_PARAMETERS = ('detecStream', 'detecLocid')
+
+FDSN_SOURCES = {
+    "http://auspass.edu.au:80": ["M8", "S1"],
+    "https://data.raspberryshake.org": ["AM"],
+    "http://geofon.gfz-potsdam.de": ["GE"],
+    "https://geof.bmkg.go.id": ["IA"],
+    "http://seisrequest.iag.usp.br": ["BL", "BR"],
+    "http://seis-pub.ga.gov.au:8081": ["AU", "2O", "3B", "YW"],
+    "https://service.iris.edu": ["AF", "AI", "AK", "AT", "BK", "BL", "C", "C1", "CM", "CN", "CU", "EC", "EI", "GB", "GI", "GT", "HK", "HV", "IC", "II", "IM", "IN", "IO", "IU", "JP", "KG", "KZ", "MI", "MM", "MX", "MY", "NK", "NN", "NO", "ON", "OV", "PB", "PL", "PM", "PS", "PT", "RM", "TC", "TM", "TW", "US", "UW", "VU", "YC"],
+    "http://webservices.ingv.it": ["MN"],
+    "https://service.geonet.org.nz": ["NZ"],
+    "http://ws.resif.fr": ["G", "ND"]
+}
+
+# Reversed so the first listed source wins for networks served by more than one (e.g. BL)
+_NETWORK_URLS = {network: base_url
+                 for base_url, networks in reversed(list(FDSN_SOURCES.items()))
+                 for network in networks}
+
+def get_fdsn_url(network):
+    if network in _NETWORK_URLS:
+        return _NETWORK_URLS[network]
     
     print(f"Warning: No specific FDSN source found for network {network}. Using IRIS as default.")
-    return Client("IRIS")
+    return "IRIS"
+
+@lru_cache(maxsize=None)
+def get_endpoint_client(base_url):
+    return Client(base_url)
+
+def get_client(network):
+    return get_endpoint_client(get_fdsn_url(network))
 
 def parse_config_xml(config_file):
-    tree = ET.parse(config_file)
-    root = tree.getroot()
-    
     stations = []
-    namespace = {'sc': 'http://geofon.gfz-potsdam.de/ns/seiscomp3-schema/0.12'}
     
-    for parameterSet in root.findall('.//sc:parameterSet', namespace):
+    # Stream the config so memory stays flat regardless of its size
+    for _, parameterSet in etree.iterparse(config_file, tag=PARAMETER_SET_TAG):
         publicID = parameterSet.get('publicID', '')
-        if publicID.startswith('ParameterSet/trunk/Station/'):
-            parts = publicID.split('/')
-            if len(parts) >= 5:
-                network = parts[3]
-                station = parts[4]
-                detecStream = None
-                detecLocid = ""
-                
-                for param in parameterSet.findall('.//sc:parameter', namespace):
-                    name_elem = param.find('sc:name', namespace)
-                    value_elem = param.find('sc:value', namespace)
-                    
-                    if name_elem is not None and value_elem is not None:
-                        name = name_elem.text
-                        value = value_elem.text
-                        if name == 'detecStream':
-                            detecStream = value if value else None
-                        elif name == 'detecLocid':
-                            detecLocid = value if value else ""
+        parts = publicID.split('/')
+        if publicID.startswith('ParameterSet/trunk/Station/') and len(parts) >= 5:
+            network = parts[3]
+            station = parts[4]
+            
+            params = {}
+            for param in parameterSet.iter(PARAMETER_TAG):
+                name_elem = param.find(NAME_TAG)
+                value_elem = param.find(VALUE_TAG)
                 
-                stations.append({
-                    "network": network,
-                    "station": station,
-                    "detecStream": detecStream,
-                    "detecLocid": detecLocid
-                })
+                if name_elem is not None and value_elem is not None and name_elem.text in STATION_PARAMETERS:
+                    params[name_elem.text] = value_elem.text
+                    if len(params) == len(STATION_PARAMETERS):
+                        break
+            
+            detecStream = params.get('detecStream') or None
+            detecLocid = params.get('detecLocid') or ""
+            
+            stations.append({
+                "network": network,
+                "station": station,
+                "detecStream": detecStream,
+                "detecLocid": detecLocid
+            })
+
+        parameterSet.clear()
+        while parameterSet.getprevious() is not None:
+            del parameterSet.getparent()[0]
     
     return stations
 
 def get_file_hash(file_path):
-    hash_md5 = hashlib.md5()
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        hash_sha256 = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hash_sha256.update(chunk)
+    return hash_sha256.hexdigest()
+
+def fetch_inventory(client, network_code, station_codes, reference_time):
+    try:
+        # First attempt with includerestricted=True
+        return client.get_stations(network=network_code, station=station_codes, 
+                                   starttime=START_DATE,
+                                   endtime=reference_time,
+                                   level="response",
+                                   includerestricted=True)
+    except Exception as e:
+        if "includerestricted" in str(e).lower():
+            # If 'includerestricted' is not supported, try without it
+            return client.get_stations(network=network_code, station=station_codes, 
+                                       starttime=START_DATE,
+                                       endtime=reference_time,
+                                       level="response")
+        # If it's a different error, re-raise it
+        raise
 
-def process_station(station_info, output_dir, reference_time):
+def write_station_inventory(inventory, station_info, output_dir):
     network_code = station_info["network"]
     station_code = station_info["station"]
-    client = get_client(network_code)
 
-    try:
-        station_dir = os.path.join(output_dir, network_code, station_code)
-        os.makedirs(station_dir, exist_ok=True)
+    station_dir = os.path.join(output_dir, network_code, station_code)
+    os.makedirs(station_dir, exist_ok=True)
 
-        xml_file = os.path.join(station_dir, f"{network_code}.{station_code}.xml")
-        old_hash = get_file_hash(xml_file) if os.path.exists(xml_file) else None
+    xml_file = os.path.join(station_dir, f"{network_code}.{station_code}.xml")
 
-        try:
-            # First attempt with includerestricted=True
-            updated_inv = client.get_stations(network=network_code, station=station_code, 
-                                              starttime=START_DATE,
-                                              endtime=reference_time,
-                                              level="response",
-                                              includerestricted=True)
-        except Exception as e:
-            if "includerestricted" in str(e).lower():
-                # If 'includerestricted' is not supported, try without it
-                print(f"Server for {network_code} doesn't support 'includerestricted'. Retrying without it.")
-                updated_inv = client.get_stations(network=network_code, station=station_code, 
-                                                  starttime=START_DATE,
-                                                  endtime=reference_time,
-                                                  level="response")
-            else:
-                # If it's a different error, re-raise it
-                raise
+    buffer = io.BytesIO()
+    inventory.write(buffer, format="STATIONXML")
+    content = buffer.getvalue()
 
-        if not updated_inv:
-            print(f"No data available for station {station_code} in network {network_code}")
+    # Only hash the old file when a size match leaves the outcome open
+    if os.path.exists(xml_file) and os.path.getsize(xml_file) == len(content):
+        if get_file_hash(xml_file) == hashlib.sha256(content).hexdigest():
             return False
 
-        updated_inv.write(xml_file, format="STATIONXML")
-        new_hash = get_file_hash(xml_file)
+    with open(xml_file, "wb") as f:
+        f.write(content)
+    return True
 
-        if old_hash != new_hash:
-            print(f"Updated inventory saved for station {station_code} in network {network_code}")
-            return True
-        else:
-            print(f"No changes in inventory for station {station_code} in network {network_code}")
-            return False
+def process_station(station_info, output_dir, reference_time, client=None):
+    network_code = station_info["network"]
+    station_code = station_info["station"]
+    if client is None:
+        client = get_client(network_code)
+
+    updated_inv = fetch_inventory(client, network_code, station_code, reference_time)
+    if not updated_inv:
+        raise ValueError("No data available")
+
+    return station_info, write_station_inventory(updated_inv, station_info, output_dir)
+
+def is_request_too_large(error):
+    return isinstance(error, (FDSNRequestTooLargeException, FDSNTimeoutException)) or "414" in str(error)
 
+def process_station_chunk(station_infos, output_dir, reference_time, client):
+    """Fetch up to STATIONS_PER_REQUEST stations of one network with a single request.
+
+    Returns a list of (station_info, outcome) pairs, where outcome is the
+    updated flag or the exception raised for that station.
+    """
+    network_code = station_infos[0]["network"]
+    station_codes = ",".join(station_info["station"] for station_info in station_infos)
+
+    try:
+        inventory = fetch_inventory(client, network_code, station_codes, reference_time)
     except Exception as e:
-        print(f"Error processing station {station_code} in network {network_code}: {str(e)}")
-        return False
+        if len(station_infos) == 1 or not is_request_too_large(e):
+            raise
+        # Fall back to one request per station
+        results = []
+        for station_info in station_infos:
+            try:
+                results.append(process_station(station_info, output_dir, reference_time, client))
+            except Exception as station_error:
+                results.append((station_info, station_error))
+        return results
+
+    results = []
+    for station_info in station_infos:
+        station_inv = inventory.select(station=station_info["station"])
+        if not station_inv:
+            results.append((station_info, ValueError("No data available")))
+            continue
+        # select() keeps the count of the batched response; match what a
+        # single-station request returns so file contents do not depend on chunking
+        for network in station_inv:
+            network.selected_number_of_stations = len(network.stations)
+        try:
+            results.append((station_info, write_station_inventory(station_inv, station_info, output_dir)))
+        except Exception as e:
+            results.append((station_info, e))
+    return results
+
+def process_stations_concurrently(stations, output_dir, reference_time, processed_stations, state_file):
+    """Fetch stations in parallel, one bounded thread pool per FDSN endpoint."""
+    updated_stations = []
+    failed_stations = []
+
+    stations_by_endpoint = defaultdict(lambda: defaultdict(list))
+    for station_info in stations:
+        network_code = station_info["network"]
+        stations_by_endpoint[get_fdsn_url(network_code)][network_code].append(station_info)
+
+    executors = []
+    futures = {}
+    journal = open(get_journal_file(state_file), 'a')
+    try:
+        for base_url, endpoint_networks in stations_by_endpoint.items():
+            try:
+                client = get_endpoint_client(base_url)
+            except Exception as e:
+                print(f"Error connecting to FDSN service {base_url}: {str(e)}")
+                for network_stations in endpoint_networks.values():
+                    failed_stations.extend(network_stations)
+                continue
+
+            executor = ThreadPoolExecutor(max_workers=MAX_WORKERS_PER_ENDPOINT)
+            executors.append(executor)
+            for network_stations in endpoint_networks.values():
+                for i in range(0, len(network_stations), STATIONS_PER_REQUEST):
+                    chunk = network_stations[i:i + STATIONS_PER_REQUEST]
+                    future = executor.submit(process_station_chunk, chunk, output_dir, reference_time, client)
+                    futures[future] = chunk
+
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [(station_info, e) for station_info in futures[future]]
+
+            for station_info, outcome in results:
+                network_code = station_info["network"]
+                station_code = station_info["station"]
+
+                if isinstance(outcome, Exception):
+                    print(f"Error processing station {station_code} in network {network_code}: {str(outcome)}")
+                elif outcome:
+                    print(f"Updated inventory saved for station {station_code} in network {network_code}")
+                else:
+                    print(f"No changes in inventory for station {station_code} in network {network_code}")
+
+                if outcome is True:
+                    updated_stations.append(station_info)
+                else:
+                    failed_stations.append(station_info)
+
+                processed_stations.add((network_code, station_code))
+                journal.write(f"{network_code}\t{station_code}\n")
+
+            journal.flush()
+    finally:
+        # On interruption, drop the chunks that have not started yet; their
+        # stations are not journaled and are fetched again on resume
+        for future in futures:
+            future.cancel()
+        for executor in executors:
+            executor.shutdown(wait=True)
+        journal.close()
+
+    return updated_stations, failed_stations
 
 def get_network_stations(client, network, reference_time):
     try:
@@ -143,14 +289,16 @@ def detect_new_stations(config_stations, fdsn_stations):
 
 def convert_to_seiscomp_xml(fdsn_xml_file, seiscomp_xml_file):
     try:
-        subprocess.run(["fdsnxml2inv", fdsn_xml_file, seiscomp_xml_file], check=True)
+        subprocess.run(["fdsnxml2inv", fdsn_xml_file, seiscomp_xml_file], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
         print(f"Converted {fdsn_xml_file} to SeisComP XML format: {seiscomp_xml_file}")
     except subprocess.CalledProcessError as e:
-        print(f"Error converting {fdsn_xml_file} to SeisComP XML: {e}")
+        print(f"Error converting {fdsn_xml_file} to SeisComP XML: {e}\n{e.stderr}")
     except FileNotFoundError:
         print("fdsnxml2inv not found. Please ensure it's installed and in your PATH.")
 
 def convert_xml_files(output_dir, networks=None):
+    pairs = []
     for root, dirs, files in os.walk(output_dir):
         network = os.path.basename(root)
         if networks and network not in networks:
@@ -159,7 +307,11 @@ def convert_xml_files(output_dir, networks=None):
             if file.endswith(".xml") and not file.startswith("seiscomp_"):
                 fdsn_xml_file = os.path.join(root, file)
                 seiscomp_xml_file = os.path.join(root, f"seiscomp_{file}")
-                convert_to_seiscomp_xml(fdsn_xml_file, seiscomp_xml_file)
+                pairs.append((fdsn_xml_file, seiscomp_xml_file))
+
+    # Each conversion is its own fdsnxml2inv process, so threads are enough to keep all cores busy
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(lambda pair: convert_to_seiscomp_xml(*pair), pairs))
 
 def merge_seiscomp_xmls(output_dir, networks=None):
     for network_dir in os.listdir(output_dir):
@@ -195,15 +347,43 @@ def merge_seiscomp_xmls(output_dir, networks=None):
             else:
                 print(f"No SeisComP XML files found for network {network_dir}")
 
+def get_journal_file(state_file):
+    # Append-only log of stations processed since the last save_state
+    return state_file + ".log"
+
 def save_state(state_file, processed_stations):
-    with open(state_file, 'w') as f:
-        json.dump(list(processed_stations), f)
+    with _state_lock:
+        if orjson:
+            with open(state_file, 'wb') as f:
+                f.write(orjson.dumps(list(processed_stations)))
+        else:
+            with open(state_file, 'w') as f:
+                json.dump(list(processed_stations), f)
+        # The snapshot now covers everything in the journal
+        journal_file = get_journal_file(state_file)
+        if os.path.exists(journal_file):
+            os.remove(journal_file)
 
 def load_state(state_file):
+    processed_stations = set()
     if os.path.exists(state_file):
-        with open(state_file, 'r') as f:
-            return set(tuple(item) for item in json.load(f))
-    return set()
+        if orjson:
+            with open(state_file, 'rb') as f:
+                processed_stations.update(tuple(item) for item in orjson.loads(f.read()))
+        else:
+            with open(state_file, 'r') as f:
+                processed_stations.update(tuple(item) for item in json.load(f))
+
+    journal_file = get_journal_file(state_file)
+    if os.path.exists(journal_file):
+        with open(journal_file, 'r') as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) == 2:
+                    processed_stations.add(tuple(fields))
+        save_state(state_file, processed_stations)
+
+    return processed_stations
 
 def update_station_inventory(config_file, output_dir, reference_time, networks_to_process, state_file):
     stations = parse_config_xml(config_file)
@@ -213,6 +393,7 @@ def update_station_inventory(config_file, output_dir, reference_time, networks_t
 
     processed_stations = load_state(state_file)
     config_stations_by_network = defaultdict(set)
+    pending_stations = []
 
     for station_info in stations:
         network = station_info['network']
@@ -223,14 +404,13 @@ def update_station_inventory(config_file, output_dir, reference_time, networks_t
 
         config_stations_by_network[network].add(station)
 
-        station_key = (network, station)
-        if station_key not in processed_stations:
-            if process_station(station_info, output_dir, reference_time):
-                updated_stations.append(station_info)
-            else:
-                failed_stations.append(station_info)
-            processed_stations.add(station_key)
-            save_state(state_file, processed_stations)
+        if (network, station) not in processed_stations:
+            pending_stations.append(station_info)
+
+    updated, failed = process_stations_concurrently(pending_stations, output_dir, reference_time,
+                                                    processed_stations, state_file)
+    updated_stations.extend(updated)
+    failed_stations.extend(failed)
 
     for network in (networks_to_process or NETWORKS_TO_CHECK_NEW_STATIONS):
         if network in config_stations_by_network:
@@ -253,15 +433,15 @@ def update_station_inventory(config_file, output_dir, reference_time, networks_t
         
         user_input = input("Do you want to add these new stations to the inventory? (yes/no): ").lower()
         if user_input == 'yes':
-            for network, stations in new_stations_by_network.items():
-                for station in stations:
-                    station_info = {"network": network, "station": station, "detecStream": None, "detecLocid": ""}
-                    if process_station(station_info, output_dir, reference_time):
-                        updated_stations.append(station_info)
-                    else:
-                        failed_stations.append(station_info)
-                    processed_stations.add((network, station))
-                    save_state(state_file, processed_stations)
+            new_station_infos = [{"network": network, "station": station, "detecStream": None, "detecLocid": ""}
+                                 for network, stations in new_stations_by_network.items()
+                                 for station in stations]
+            updated, failed = process_stations_concurrently(new_station_infos, output_dir, reference_time,
+                                                            processed_stations, state_file)
+            updated_stations.extend(updated)
+            failed_stations.extend(failed)
+
+    save_state(state_file, processed_stations)
 
     user_input = input("\nDo you want to convert updated FDSNXML files to SeisComP XML? (yes/no): ").lower()
     if user_input == 'yes':
@@ -1,11 +1,36 @@
-from obspy import read
+from obspy.io.mseed.util import get_record_information
 import os
 import argparse
 
+# Data quality indicators of SEED data records
+DATA_RECORD_TYPES = b"DRQM"
+
+def _record_offsets(fin, file_size):
+    # Offset and length of every record. Each length is read from the
+    # record's own header, since files may mix e.g. 512 and 4096 byte records.
+    offsets = []
+    offset = 0
+    while offset < file_size:
+        fin.seek(offset)
+        header = fin.read(20)
+        if len(header) < 20 or not header[0:6].isdigit() or header[6] not in DATA_RECORD_TYPES:
+            raise ValueError(f"No valid MiniSEED data record header at byte {offset}")
+        
+        record_length = get_record_information(fin, offset=offset)["record_length"]
+        if offset + record_length > file_size:
+            raise ValueError(f"Truncated MiniSEED record at byte {offset}")
+        offsets.append((offset, record_length))
+        offset += record_length
+    return offsets
+
 def modify_miniseed_codes(input_file, output_file, new_network=None, new_station=None):
     """
     Modify network and/or station codes in a MiniSEED file.
     
+    The codes are patched directly in the fixed header of every data record,
+    so the sample data is copied byte for byte without being decoded. All
+    record headers are checked before anything is written.
+    
     Parameters:
     -----------
     input_file : str
@@ -23,28 +48,34 @@ def modify_miniseed_codes(input_file, output_file, new_network=None, new_station
         True if successful, False otherwise
     """
     try:
-        # Read the MiniSEED file
-        st = read(input_file)
-        
         # Check if any modifications are requested
         if not (new_network or new_station):
             print("No modifications requested")
             return False
             
-        # Iterate through all traces in the stream
-        for tr in st:
-            if new_network:
-                if len(new_network) != 2:
-                    raise ValueError("Network code must be exactly 2 characters")
-                tr.stats.network = new_network
-                
-            if new_station:
-                if len(new_station) > 5:
-                    raise ValueError("Station code cannot exceed 5 characters")
-                tr.stats.station = new_station
-                
-        # Write the modified stream to a new file
-        st.write(output_file, format='MSEED')
+        if new_network and len(new_network) != 2:
+            raise ValueError("Network code must be exactly 2 characters")
+            
+        if new_station and len(new_station) > 5:
+            raise ValueError("Station code cannot exceed 5 characters")
+        
+        # Fixed header fields are space padded ASCII
+        network_bytes = new_network.encode("ascii") if new_network else None
+        station_bytes = new_station.ljust(5).encode("ascii") if new_station else None
+        
+        with open(input_file, "rb") as fin:
+            offsets = _record_offsets(fin, os.fstat(fin.fileno()).st_size)
+            
+            with open(output_file, "wb") as fout:
+                for offset, record_length in offsets:
+                    fin.seek(offset)
+                    record = bytearray(fin.read(record_length))
+                    if station_bytes:
+                        record[8:13] = station_bytes
+                    if network_bytes:
+                        record[18:20] = network_bytes
+                    fout.write(record)
+        
         print(f"Successfully modified {input_file} and saved to {output_file}")
         return True
         
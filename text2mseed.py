@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
 from obspy import read
+from obspy.io.mseed import InternalMSEEDError
 import argparse
 import sys
 
@@ -14,8 +15,14 @@ def txt_to_miniseed(input_file, output_file, network='IM', station='STKA'):
             tr.stats.network = network
             tr.stats.station = station
         
-        # Write to MiniSEED
-        stream.write(output_file, format='MSEED')
+        # Write to MiniSEED (ObsPy uses STEIM2 for integer samples)
+        try:
+            stream.write(output_file, format='MSEED')
+        except InternalMSEEDError:
+            # STEIM2 only holds differences up to 30 bits; STEIM1 takes any int32
+            if not all(tr.data.dtype.name == 'int32' for tr in stream):
+                raise
+            stream.write(output_file, format='MSEED', encoding='STEIM1')
         print(f"\nConverted {input_file} to {output_file}")
         print(f"Number of channels processed: {len(stream)}")
         
@@ -1,36 +1,165 @@
 #!/usr/bin/env python
 
+import os
 import sys
 import math
 import csv
+import pickle
+import tempfile
 import logging
 from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Iterator
 from enum import Enum
+from functools import lru_cache
+import numpy as np
 import seiscomp.core
 import seiscomp.client
 import seiscomp.datamodel as DM
 import seiscomp.logging
 from seiscomp.seismology import Regions
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('event_naming.log')
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
+class SeisComPLogHandler(logging.Handler):
+    """Forward log records to the SeisComP logging framework.
+
+    SeisComP logging only works while the application is initialized, so
+    records outside that window go to stderr instead.
+    """
+
+    # Set by EventNaming between a successful init() and done()
+    active = False
+
+    def __init__(self):
+        super().__init__()
+        self._fallback = logging.StreamHandler()
+        self._fallback.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    def emit(self, record):
+        if not self.active:
+            self._fallback.handle(record)
+            return
+        try:
+            msg = self.format(record)
+            if record.levelno >= logging.ERROR:
+                seiscomp.logging.error(msg)
+            elif record.levelno >= logging.WARNING:
+                seiscomp.logging.warning(msg)
+            elif record.levelno >= logging.INFO:
+                seiscomp.logging.info(msg)
+            else:
+                seiscomp.logging.debug(msg)
+        except Exception:
+            self.handleError(record)
+
+
+# Log through SeisComP, which already handles the console (--console),
+# log files, rotation and verbosity
+logger.setLevel(logging.INFO)
+logger.addHandler(SeisComPLogHandler())
+logger.propagate = False
+
+EARTH_RADIUS_KM = 6371
+# Bump when the layout of the pickled locations cache changes
+LOCATION_CACHE_VERSION = 6
+LOCATION_FIELDS = {'name', 'state', 'country', 'latitude', 'longitude', 'population'}
+# Queued notifiers are sent as one message per this many events
+EVENTS_PER_MESSAGE = 100
+
+
+@lru_cache(maxsize=100_000)
+def _region_name(lat: float, lon: float) -> str:
+    """Regions.getRegionName, memoized since the polygon lookup is costly"""
+    return Regions.getRegionName(lat, lon)
+
+
+# Optional accelerators are imported on first use so that --help and
+# parameter errors do not pay for loading them
+@lru_cache(maxsize=None)
+def _kdtree_class():
+    """scipy's cKDTree, or None if scipy is not installed"""
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return None
+    return cKDTree
+
+
+@lru_cache(maxsize=None)
+def _pandas():
+    """The pandas module, or None if it is not installed"""
+    try:
+        import pandas
+    except ImportError:
+        return None
+    return pandas
+
+
+# Bound once so the scalar helper below skips the math attribute lookups
+_sin, _cos = math.sin, math.cos
+_atan2, _radians, _degrees = math.atan2, math.radians, math.degrees
+
+
+def _bearing_deg(lat1, lon1, lat2, lon2):
+    """Initial bearing in degrees [0, 360) from point 1 to point 2"""
+    lat1, lat2, dlon = _radians(lat1), _radians(lat2), _radians(lon2 - lon1)
+    cos_lat2 = _cos(lat2)
+    y = _sin(dlon) * cos_lat2
+    x = _cos(lat1) * _sin(lat2) - _sin(lat1) * cos_lat2 * _cos(dlon)
+    return (_degrees(_atan2(y, x)) + 360) % 360
+
+
+def _closest_index(event_lat, event_lon, lats, lons, cos_lats, max_distance):
+    """Index of and distance (km) to the nearest of lats/lons (radians)
+
+    Returns an index of -1 if nothing lies within max_distance (km).
+    """
+    cos_event_lat = np.cos(event_lat)
+    best_i = -1
+    # Start from the haversine term of max_distance so nothing further away is kept
+    best_a = np.sin(min(max_distance / EARTH_RADIUS_KM, np.pi) / 2)**2
+    # The haversine term is monotonic in distance, so compare it directly
+    for i in range(lats.size):
+        a = np.sin((lats[i] - event_lat) / 2)**2 + cos_event_lat * \
+            cos_lats[i] * np.sin((lons[i] - event_lon) / 2)**2
+        if a < best_a:
+            best_a = a
+            best_i = i
+    return best_i, 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(min(best_a, 1.0)))
+
+
+@lru_cache(maxsize=None)
+def _closest_index_kernel():
+    """_closest_index compiled with Numba, or None if numba is not installed"""
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True, fastmath=True)(_closest_index)
+
+
 class DirectionType(Enum):
     CARDINAL = "cardinal"  # N, S, E, W
     INTERCARDINAL = "intercardinal"  # NE, SE, SW, NW
     DETAILED = "detailed"  # N, NNE, NE, ENE, etc.
 
 
+_CARDINAL_DIRS = ("N", "E", "S", "W")
+_INTERCARDINAL_DIRS = ("N", "NE", "E", "SE", "S", "SW", "W", "NW")
+_DETAILED_DIRS = ("N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+                  "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW")
+
+# Direction names, sectors per degree and index mask for each direction type
+_DIRECTION_TABLES = {
+    direction_type: (dirs, len(dirs) / 360, len(dirs) - 1)
+    for direction_type, dirs in ((DirectionType.CARDINAL, _CARDINAL_DIRS),
+                                 (DirectionType.INTERCARDINAL, _INTERCARDINAL_DIRS),
+                                 (DirectionType.DETAILED, _DETAILED_DIRS))
+}
+
+
 @dataclass
 class LocationReference:
     """Enhanced location reference with validation"""
@@ -49,28 +178,178 @@ class LocationReference:
         if not self.name:
             raise ValueError("Location name cannot be empty")
 
+    @classmethod
+    def from_trusted(cls, name: str, state: str, country: str, lat: float, lon: float,
+                     population: Optional[int] = None) -> 'LocationReference':
+        """Build a location from already validated data, skipping __post_init__"""
+        loc = object.__new__(cls)
+        loc.name = name
+        loc.state = state
+        loc.country = country
+        loc.lat = lat
+        loc.lon = lon
+        loc.population = population
+        return loc
+
     def __str__(self):
         return f"{self.name}, {self.state}, {self.country}"
 
 
 class LocationCache:
-    """Cache for storing and managing location references"""
+    """Cache for storing and managing location references.
+
+    Locations are kept as parallel NumPy columns sorted by latitude; a
+    LocationReference is only built for the rows that are asked for.
+    """
+
+    _COLUMNS = ('_names', '_states', '_countries', '_lat_deg', '_lon_deg',
+                '_pop', '_lat', '_lon', '_cos_lat')
 
     def __init__(self):
-        self._locations: Dict[str, LocationReference] = {}
+        self.clear()
 
     def add(self, location: LocationReference):
-        key = f"{location.name}_{location.state}_{location.country}"
-        self._locations[key] = location
+        # Later duplicates replace earlier ones and take their place in the order
+        key = (location.name, location.state, location.country)
+        self._pending.pop(key, None)
+        self._pending[key] = (location.name, location.state, location.country,
+                              location.lat, location.lon,
+                              0 if location.population is None else location.population)
+
+    def add_columns(self, names, states, countries, lats, lons, populations):
+        """Add already validated, duplicate-free locations column-wise"""
+        self._pending_columns.append((
+            np.asarray(names, dtype=object), np.asarray(states, dtype=object),
+            np.asarray(countries, dtype=object), np.asarray(lats, dtype=float),
+            np.asarray(lons, dtype=float), np.asarray(populations, dtype=np.int64)))
+
+    def finalize(self):
+        """Merge rows added since the last call into the sorted columns"""
+        if not self._pending and not self._pending_columns:
+            return
+
+        batches = []
+        if len(self._names):
+            batches.append((self._names, self._states, self._countries,
+                            self._lat_deg, self._lon_deg, self._pop))
+        batches.extend(self._pending_columns)
+        if self._pending:
+            names, states, countries, lats, lons, pops = zip(*self._pending.values())
+            batches.append((np.array(names, dtype=object), np.array(states, dtype=object),
+                            np.array(countries, dtype=object), np.array(lats, dtype=float),
+                            np.array(lons, dtype=float), np.array(pops, dtype=np.int64)))
+        self._pending = {}
+        self._pending_columns = []
+
+        if len(batches) == 1:
+            names, states, countries, lats, lons, pops = batches[0]
+        else:
+            names, states, countries, lats, lons, pops = [
+                np.concatenate(column) for column in zip(*batches)]
+            # Each batch is duplicate-free on its own; across batches the
+            # last occurrence of a location wins
+            last = {key: i for i, key in enumerate(zip(names, states, countries))}
+            keep = np.fromiter(sorted(last.values()), dtype=np.intp, count=len(last))
+            names, states, countries = names[keep], states[keep], countries[keep]
+            lats, lons, pops = lats[keep], lons[keep], pops[keep]
+
+        # Sorted by latitude so searches can restrict themselves to a band
+        order = np.argsort(lats, kind='stable')
+        self._names = names[order]
+        self._states = states[order]
+        self._countries = countries[order]
+        self._lat_deg = lats[order]
+        self._lon_deg = lons[order]
+        self._pop = pops[order]
+        self._lat = np.radians(self._lat_deg)
+        self._lon = np.radians(self._lon_deg)
+        self._cos_lat = np.cos(self._lat)
+
+        # Chord length is monotonic in great-circle distance, so the nearest
+        # neighbour in 3D is also the nearest on the sphere
+        self._tree = None
+        cKDTree = _kdtree_class()
+        if cKDTree is not None:
+            # A few thousand points do not need a balanced, compacted tree;
+            # skipping that makes construction cheaper at no real query cost
+            self._tree = cKDTree(np.column_stack(
+                [self._cos_lat * np.cos(self._lon), self._cos_lat * np.sin(self._lon),
+                 np.sin(self._lat)]), leafsize=32, balanced_tree=False, compact_nodes=False)
+
+    def get(self, idx: int) -> LocationReference:
+        """The location at position idx of the sorted columns"""
+        self.finalize()
+        # Rows were validated when they were added
+        return LocationReference.from_trusted(
+            name=self._names[idx], state=self._states[idx], country=self._countries[idx],
+            lat=float(self._lat_deg[idx]), lon=float(self._lon_deg[idx]),
+            population=int(self._pop[idx]))
+
+    def get_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Latitudes and longitudes in radians and the cosine of each latitude"""
+        self.finalize()
+        return self._lat, self._lon, self._cos_lat
+
+    def get_tree(self):
+        """k-d tree over unit-sphere Cartesian coordinates, or None without scipy"""
+        self.finalize()
+        return self._tree
+
+    def save(self, cache_file: str, key: tuple):
+        """Pickle columns and tree to cache_file, tagged with key"""
+        self.finalize()
+        columns = {name: getattr(self, name) for name in self._COLUMNS}
+        # A unique temp file per writer, so concurrent runs do not clobber
+        # each other; os.replace makes whichever finishes last win
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(cache_file) or '.',
+                                        prefix=os.path.basename(cache_file) + '.',
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((key, columns, self._tree), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            # mkstemp creates the file private to the owner
+            os.chmod(tmp_file, 0o644)
+            os.replace(tmp_file, cache_file)
+        except BaseException:
+            # Do not leave a partial cache file behind
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            raise
 
-    def get_all(self) -> List[LocationReference]:
-        return list(self._locations.values())
+    def load(self, cache_file: str, key: tuple) -> bool:
+        """Restore a cache written by save(); False if missing, stale or unreadable"""
+        try:
+            with open(cache_file, 'rb') as f:
+                cached_key, columns, tree = pickle.load(f)
+        except Exception:
+            return False
+        if cached_key != key:
+            return False
+
+        self.clear()
+        for name in self._COLUMNS:
+            setattr(self, name, columns[name])
+        self._tree = tree
+        return True
 
     def clear(self):
-        self._locations.clear()
+        self._pending: Dict[tuple, tuple] = {}
+        self._pending_columns: List[tuple] = []
+        for name in self._COLUMNS:
+            dtype = float
+            if name in ('_names', '_states', '_countries'):
+                dtype = object
+            elif name == '_pop':
+                dtype = np.int64
+            setattr(self, name, np.empty(0, dtype=dtype))
+        self._tree = None
 
     def size(self) -> int:
-        return len(self._locations)
+        self.finalize()
+        return len(self._names)
 
 
 class EventNamingConfig:
@@ -108,11 +387,27 @@ class EventNaming(seiscomp.client.Application):
 
         self.location_cache = LocationCache()
         self.config = EventNamingConfig()
+        self._closest_cache: Dict[tuple, Optional[Tuple[LocationReference, float, str]]] = {}
+        # Events with notifiers waiting for the next sendNotifications()
+        self._queuedEventIDs: List[str] = []
+
+    def init(self):
+        if not super(EventNaming, self).init():
+            return False
+        SeisComPLogHandler.active = True
+        return True
+
+    def done(self):
+        SeisComPLogHandler.active = False
+        super(EventNaming, self).done()
 
     def createCommandLineDescription(self):
         """Create command line options"""
         self.commandline().addGroup("Event")
-        self.commandline().addStringOption("Event", "eventID,E", "Event ID to process")
+        self.commandline().addStringOption("Event", "eventID,E",
+                                           "Event ID to process, or a comma-separated list of event IDs")
+        self.commandline().addStringOption("Event", "eventID-file",
+                                           "File with one event ID per line")
         self.commandline().addStringOption("Event", "locations-file,L",
                                            "CSV file with reference locations")
         self.commandline().addStringOption("Event", "direction-type,D",
@@ -145,6 +440,18 @@ class EventNaming(seiscomp.client.Application):
                 logger.setLevel(logging.DEBUG)
                 self.config.debug_mode = True
 
+            # Collect event IDs so several events share one start-up
+            self.eventIDs = []
+            if self.commandline().hasOption("eventID"):
+                self.eventIDs.extend(
+                    eid.strip() for eid in self.commandline().optionString("eventID").split(",")
+                    if eid.strip())
+            if self.commandline().hasOption("eventID-file"):
+                with open(self.commandline().optionString("eventID-file"), 'r') as f:
+                    self.eventIDs.extend(
+                        line.strip() for line in f
+                        if line.strip() and not line.startswith('#'))
+
             self.locations_file = self.commandline().optionString("locations-file")
             logger.info(f"Using locations file: {self.locations_file}")
 
@@ -157,149 +464,230 @@ class EventNaming(seiscomp.client.Application):
 
     def loadLocations(self) -> bool:
         """Load locations with enhanced error handling"""
+        self._closest_cache.clear()
         try:
-            with open(self.locations_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                required_fields = {'name', 'state', 'country',
-                                   'latitude', 'longitude', 'population'}
-                if not required_fields.issubset(reader.fieldnames):
-                    missing = required_fields - set(reader.fieldnames)
-                    raise ValueError(f"Missing required fields: {missing}")
-
-                for row_num, row in enumerate(reader, start=2):
-                    try:
-                        loc = LocationReference(
-                            name=row['name'].strip(),
-                            state=row['state'].strip(),
-                            country=row['country'].strip(),
-                            lat=float(row['latitude']),
-                            lon=float(row['longitude']),
-                            population=int(row.get('population', 0))
-                        )
-                        if loc.population >= self.config.min_population:
-                            self.location_cache.add(loc)
-                    except (ValueError, KeyError) as e:
-                        logger.warning(
-                            f"Skipping invalid row {row_num}: {str(e)}")
-                        continue
+            # Reuse the parsed locations and tree while the CSV is unchanged
+            stat = os.stat(self.locations_file)
+            cache_file = f"{self.locations_file}.cache.pkl"
+            cache_key = (LOCATION_CACHE_VERSION, stat.st_mtime_ns, stat.st_size,
+                         self.config.min_population, _kdtree_class() is not None)
+            if self.location_cache.load(cache_file, cache_key):
+                logger.info(
+                    f"Loaded {self.location_cache.size()} locations from cache {cache_file}")
+                self._warmUpKernel()
+                return True
+
+            if _pandas() is not None:
+                self.location_cache.add_columns(*self._readLocationsPandas())
+            else:
+                for loc in self._readLocationsCsv():
+                    self.location_cache.add(loc)
 
             locations_count = self.location_cache.size()
             if locations_count == 0:
                 raise ValueError("No valid locations loaded from file")
 
             logger.info(f"Successfully loaded {locations_count} locations")
+
+            # The cache is only an optimization; the locations are loaded either way
+            try:
+                self.location_cache.save(cache_file, cache_key)
+            except Exception as e:
+                logger.warning(f"Could not write locations cache: {e}")
+            self._warmUpKernel()
             return True
 
         except Exception as e:
             logger.error(f"Failed to load locations: {str(e)}")
             return False
 
+    def _warmUpKernel(self):
+        """Compile the Numba scan now rather than while processing the first event"""
+        kernel = _closest_index_kernel()
+        if kernel is not None and self.location_cache.get_tree() is None:
+            lat, lon, cos_lat = self.location_cache.get_arrays()
+            kernel(0.0, 0.0, lat[:1], lon[:1], cos_lat[:1], 0.0)
+
+    def _readLocationsCsv(self) -> Iterator[LocationReference]:
+        """Parse the locations file row by row with the csv module"""
+        with open(self.locations_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            if not LOCATION_FIELDS.issubset(reader.fieldnames):
+                missing = LOCATION_FIELDS - set(reader.fieldnames)
+                raise ValueError(f"Missing required fields: {missing}")
+
+            for row_num, row in enumerate(reader, start=2):
+                try:
+                    loc = LocationReference(
+                        name=row['name'].strip(),
+                        state=row['state'].strip(),
+                        country=row['country'].strip(),
+                        lat=float(row['latitude']),
+                        lon=float(row['longitude']),
+                        population=int(row.get('population', 0))
+                    )
+                    if loc.population >= self.config.min_population:
+                        yield loc
+                except (ValueError, KeyError) as e:
+                    logger.warning(
+                        f"Skipping invalid row {row_num}: {str(e)}")
+                    continue
+
+    def _readLocationsPandas(self) -> tuple:
+        """Parse and validate the locations file column-wise with pandas.
+
+        Returns name, state, country, latitude, longitude and population
+        columns of the valid locations, ready for LocationCache.add_columns.
+        """
+        pd = _pandas()
+        df = pd.read_csv(self.locations_file, encoding='utf-8', dtype=str,
+                         keep_default_na=False,
+                         usecols=lambda column: column in LOCATION_FIELDS)
+        if not LOCATION_FIELDS.issubset(df.columns):
+            missing = LOCATION_FIELDS - set(df.columns)
+            raise ValueError(f"Missing required fields: {missing}")
+
+        names = df['name'].str.strip()
+        states = df['state'].str.strip()
+        countries = df['country'].str.strip()
+        lats = pd.to_numeric(df['latitude'], errors='coerce')
+        lons = pd.to_numeric(df['longitude'], errors='coerce')
+        # Whole numbers only, as int() in the csv reader: 60000.7 or 1e5 are invalid
+        raw_populations = df['population'].str.strip()
+        whole = raw_populations.str.fullmatch(r'[+-]?\d+(?:_\d+)*')
+        populations = pd.to_numeric(
+            raw_populations.where(whole).str.replace('_', '', regex=False), errors='coerce')
+
+        valid = ((names != "") & lats.between(-90, 90) & lons.between(-180, 180)
+                 & populations.notna())
+        invalid_rows = [str(i + 2) for i in df.index[~valid]]
+        if invalid_rows:
+            logger.warning(
+                f"Skipping {len(invalid_rows)} invalid rows: {', '.join(invalid_rows)}")
+
+        keep = valid & (populations >= self.config.min_population)
+        locations = pd.DataFrame({'name': names, 'state': states, 'country': countries,
+                                  'latitude': lats, 'longitude': lons,
+                                  'population': populations})[keep]
+        # Later duplicates replace earlier ones, as with LocationCache.add
+        locations = locations.drop_duplicates(['name', 'state', 'country'], keep='last')
+        return (locations['name'].to_numpy(dtype=object),
+                locations['state'].to_numpy(dtype=object),
+                locations['country'].to_numpy(dtype=object),
+                locations['latitude'].to_numpy(dtype=float),
+                locations['longitude'].to_numpy(dtype=float),
+                locations['population'].to_numpy(dtype='int64'))
+
     def getDirectionString(self, bearing: float) -> str:
         """Enhanced direction string generator with multiple granularity levels"""
         # Normalize bearing to 0-360
         bearing = (bearing + 360) % 360
 
-        if self.config.direction_type == DirectionType.CARDINAL:
-            dirs = ["N", "E", "S", "W"]
-            idx = int((bearing + 45) % 360 / 90)
-            return dirs[idx]
-
-        elif self.config.direction_type == DirectionType.INTERCARDINAL:
-            dirs = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
-            idx = int((bearing + 22.5) % 360 / 45)
-            return dirs[idx]
-
-        else:  # DETAILED
-            dirs = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
-                    "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
-            idx = int((bearing + 11.25) % 360 / 22.5)
-            return dirs[idx]
-
-    def calculateDistance(self, ref_lat: float, ref_lon: float,
-                          event_lat: float, event_lon: float) -> Tuple[float, float]:
-        """Calculate distance and bearing using Haversine formula"""
-        try:
-            R = 6371  # Earth radius in kilometers
-            lat1, lon1 = map(math.radians, [ref_lat, ref_lon])
-            lat2, lon2 = map(math.radians, [event_lat, event_lon])
-
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-
-            a = math.sin(dlat/2)**2 + math.cos(lat1) * \
-                math.cos(lat2) * math.sin(dlon/2)**2
-            c = 2 * math.asin(math.sqrt(a))
-            distance = R * c
-
-            # Calculate bearing
-            y = math.sin(lon2 - lon1) * math.cos(lat2)
-            x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * \
-                math.cos(lat2) * math.cos(lon2 - lon1)
-            bearing = math.degrees(math.atan2(y, x))
-            bearing = (bearing + 360) % 360
-
-            logger.debug(
-                f"Distance calculation: {distance:.1f}km, bearing: {bearing:.1f}°")
-            return distance, bearing
-
-        except Exception as e:
-            logger.error(f"Error in distance calculation: {e}")
-            raise
+        # Round to the nearest sector; the tables have power-of-two sizes so
+        # the mask wraps 360 back to N
+        dirs, sectors_per_degree, mask = _DIRECTION_TABLES[self.config.direction_type]
+        return dirs[int(bearing * sectors_per_degree + 0.5) & mask]
 
     def findClosestLocation(self, event_lat: float, event_lon: float) -> Optional[Tuple[LocationReference, float, str]]:
         """Find closest location with enhanced filtering and validation"""
-        locations = self.location_cache.get_all()
-        if not locations:
+        # Events sharing a location (e.g. re-runs) are only searched once
+        key = (event_lat, event_lon, self.config.max_distance, self.config.direction_type)
+        if key not in self._closest_cache:
+            self._closest_cache[key] = self._searchClosestLocation(event_lat, event_lon)
+        return self._closest_cache[key]
+
+    def _searchClosestLocation(self, event_lat: float, event_lon: float) -> Optional[Tuple[LocationReference, float, str]]:
+        if self.location_cache.size() == 0:
             logger.error("No locations available")
             return None
 
-        closest = None
-        min_distance = float('inf')
-        closest_bearing = 0
-
-        logger.debug(f"Searching closest location to {event_lat}, {event_lon}")
-
-        for loc in locations:
-            try:
-                distance, bearing = self.calculateDistance(
-                    loc.lat, loc.lon, event_lat, event_lon)
-
-                # Skip if beyond max distance
-                if distance > self.config.max_distance:
-                    continue
-
-                if distance < min_distance:
-                    min_distance = distance
-                    closest = loc
-                    closest_bearing = bearing
-                    logger.debug(
-                        f"New closest: {loc.name} at {distance:.1f}km")
-
-            except Exception as e:
-                logger.warning(
-                    f"Error processing location {loc.name}: {str(e)}")
-                continue
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Searching closest location to %s, %s", event_lat, event_lon)
+
+        lat, lon, cos_lat = self.location_cache.get_arrays()
+        event_lat_rad = math.radians(event_lat)
+        event_lon_rad = math.radians(event_lon)
+        cos_event_lat = math.cos(event_lat_rad)
+
+        tree = self.location_cache.get_tree()
+        if tree is not None:
+            # Let the tree prune everything beyond max_distance (as a chord)
+            max_angle = min(self.config.max_distance / EARTH_RADIUS_KM, math.pi)
+            chord, idx = tree.query([cos_event_lat * math.cos(event_lon_rad),
+                                     cos_event_lat * math.sin(event_lon_rad),
+                                     math.sin(event_lat_rad)], k=1,
+                                    distance_upper_bound=2 * math.sin(max_angle / 2) + 1e-12)
+            if math.isinf(chord):
+                logger.warning("No location found within maximum distance")
+                return None
+            idx = int(idx)
+            min_distance = 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+        else:
+            # Locations are sorted by latitude, and anything further than
+            # max_distance in latitude alone cannot qualify
+            window = self.config.max_distance / EARTH_RADIUS_KM
+            start = int(np.searchsorted(lat, event_lat_rad - window, side='left'))
+            end = int(np.searchsorted(lat, event_lat_rad + window, side='right'))
+            if start == end:
+                logger.warning("No location found within maximum distance")
+                return None
+
+            lat, lon, cos_lat = lat[start:end], lon[start:end], cos_lat[start:end]
+
+            # Same idea for longitude, unless the search circle reaches a pole
+            candidates = None
+            if window < math.pi / 2 - abs(event_lat_rad):
+                max_dlon = math.asin(min(math.sin(window) / cos_event_lat, 1.0)) + 1e-12
+                dlon = np.abs((lon - event_lon_rad + math.pi) % (2 * math.pi) - math.pi)
+                candidates = np.flatnonzero(dlon <= max_dlon)
+                if candidates.size == 0:
+                    logger.warning("No location found within maximum distance")
+                    return None
+                lat, lon, cos_lat = lat[candidates], lon[candidates], cos_lat[candidates]
+
+            kernel = _closest_index_kernel()
+            if kernel is not None:
+                idx, min_distance = kernel(event_lat_rad, event_lon_rad, lat, lon,
+                                           cos_lat, float(self.config.max_distance))
+                if idx < 0:
+                    logger.warning("No location found within maximum distance")
+                    return None
+                idx = int(idx)
+                min_distance = float(min_distance)
+            else:
+                # Haversine distance to the remaining locations at once
+                a = np.sin((lat - event_lat_rad) / 2)**2 + cos_event_lat * \
+                    cos_lat * np.sin((lon - event_lon_rad) / 2)**2
+                distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+                idx = int(np.argmin(distances))
+                min_distance = float(distances[idx])
+
+            if candidates is not None:
+                idx = int(candidates[idx])
+            idx += start
+
+        if min_distance > self.config.max_distance:
+            logger.warning("No location found within maximum distance")
+            return None
 
-        if closest:
-            direction = self.getDirectionString(closest_bearing)
-            return closest, min_distance, direction
+        closest = self.location_cache.get(idx)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Closest: %s at %.1fkm", closest.name, min_distance)
 
-        logger.warning("No location found within maximum distance")
-        return None
+        # Bearing is only needed for the winner
+        bearing = _bearing_deg(closest.lat, closest.lon, event_lat, event_lon)
+        direction = self.getDirectionString(bearing)
+        return closest, min_distance, direction
 
     def run(self):
         """Main processing function"""
         try:
-            # Get event ID
-            try:
-                eventID = self.commandline().optionString("eventID")
-            except Exception:
-                logger.error("No event ID specified, use --eventID")
+            if not self.eventIDs:
+                logger.error("No event ID specified, use --eventID or --eventID-file")
                 return False
 
-            # Load locations file
+            # Load locations file once for all events
             try:
-                locations_file = self.commandline().optionString("locations-file")
                 if not self.loadLocations():
                     logger.error("Failed to load locations from file")
                     return False
@@ -307,6 +695,23 @@ class EventNaming(seiscomp.client.Application):
                 logger.error(f"Error loading locations file: {e}")
                 return False
 
+            success = True
+            for count, eventID in enumerate(self.eventIDs, 1):
+                if not self.processEvent(eventID):
+                    success = False
+                if count % EVENTS_PER_MESSAGE == 0 and not self.sendNotifications():
+                    success = False
+            if not self.sendNotifications():
+                success = False
+            return success
+
+        except Exception as e:
+            logger.error(f"Unhandled error in main processing: {e}")
+            return False
+
+    def processEvent(self, eventID: str) -> bool:
+        """Name a single event"""
+        try:
             # Load event from database
             event = self.query().loadObject(DM.Event.TypeInfo(), eventID)
             if not event:
@@ -364,7 +769,7 @@ class EventNaming(seiscomp.client.Application):
                 result = self.findClosestLocation(lat, lon)
                 if not result:
                     # If no nearby city found, use region name only
-                    region_name = Regions.getRegionName(lat, lon)
+                    region_name = _region_name(lat, lon)
                     logger.info(
                         f"No nearby city found, using region: {region_name}")
                     if region_name:
@@ -389,7 +794,7 @@ class EventNaming(seiscomp.client.Application):
                 location_name = f"{distance_km} km {direction} of {base_location}"
 
                 # Get region information
-                region_name = Regions.getRegionName(lat, lon)
+                region_name = _region_name(lat, lon)
                 if region_name:
                     region_name = f"{base_location} ({region_name})"
                 else:
@@ -400,8 +805,6 @@ class EventNaming(seiscomp.client.Application):
 
                 # Update event descriptions in database
                 if self.updateEventDescriptions(event, region_name, location_name):
-                    logger.info("Successfully updated event descriptions")
-
                     # Add additional information as comment if configured
                     if self.config.debug_mode:
                         comment = (f"Location details: Distance={distance_km}km, "
@@ -418,7 +821,7 @@ class EventNaming(seiscomp.client.Application):
                 return False
 
         except Exception as e:
-            logger.error(f"Unhandled error in main processing: {e}")
+            logger.error(f"Unhandled error processing event {eventID}: {e}")
             return False
 
     def updateEventDescriptions(self, event: DM.Event, region_name: str, location_name: str) -> bool:
@@ -426,17 +829,15 @@ class EventNaming(seiscomp.client.Application):
         try:
             DM.Notifier.Enable()
 
-            # Update region name description
-            region_desc = None
-            location_desc = None
+            changed = False
 
-            # Find existing descriptions
+            # Find existing descriptions, indexed by type in a single pass
+            descriptions = {}
             for i in range(event.eventDescriptionCount()):
                 desc = event.eventDescription(i)
-                if desc.type() == DM.REGION_NAME:
-                    region_desc = desc
-                elif desc.type() == DM.EARTHQUAKE_NAME:
-                    location_desc = desc
+                descriptions[desc.type()] = desc
+            region_desc = descriptions.get(DM.REGION_NAME)
+            location_desc = descriptions.get(DM.EARTHQUAKE_NAME)
 
             # Update or create region name description
             if region_desc:
@@ -444,6 +845,7 @@ class EventNaming(seiscomp.client.Application):
                     logger.debug(f"Updating region name: {region_name}")
                     region_desc.setText(region_name)
                     DM.Notifier.Create(event, DM.OP_UPDATE, region_desc)
+                    changed = True
             else:
                 logger.debug(f"Creating new region name: {region_name}")
                 region_desc = DM.EventDescription()
@@ -451,6 +853,7 @@ class EventNaming(seiscomp.client.Application):
                 region_desc.setText(region_name)
                 event.add(region_desc)
                 DM.Notifier.Create(event, DM.OP_ADD, region_desc)
+                changed = True
 
             # Update or create location name description
             if location_desc:
@@ -458,6 +861,7 @@ class EventNaming(seiscomp.client.Application):
                     logger.debug(f"Updating location name: {location_name}")
                     location_desc.setText(location_name)
                     DM.Notifier.Create(event, DM.OP_UPDATE, location_desc)
+                    changed = True
             else:
                 logger.debug(f"Creating new location name: {location_name}")
                 location_desc = DM.EventDescription()
@@ -465,15 +869,15 @@ class EventNaming(seiscomp.client.Application):
                 location_desc.setText(location_name)
                 event.add(location_desc)
                 DM.Notifier.Create(event, DM.OP_ADD, location_desc)
+                changed = True
 
-            # Send notifications unless in test mode
-            if not self.test:
-                msg = DM.Notifier.GetMessage()
-                if msg:
-                    self.connection().send(msg)
-                    logger.info("Sent database update notification")
+            # Nothing to send when re-running on an already named event;
+            # otherwise the notifiers stay queued and run() sends them in batches
+            if not changed:
+                logger.info("Event descriptions already up to date")
             else:
-                logger.info("Test mode - no database updates sent")
+                self._queuedEventIDs.append(event.publicID())
+                logger.info("Queued event description update")
 
             DM.Notifier.Disable()
             return True
@@ -495,10 +899,9 @@ class EventNaming(seiscomp.client.Application):
                 DM.Notifier.Enable()
                 # Correct way to create a notifier for the comment
                 DM.Notifier.Create(event.publicID(), DM.OP_UPDATE, commentObj)
-                msg = DM.Notifier.GetMessage()
-                if msg:
-                    self.connection().send(msg)
                 DM.Notifier.Disable()
+                if event.publicID() not in self._queuedEventIDs:
+                    self._queuedEventIDs.append(event.publicID())
 
             logger.debug(f"Added event comment: {comment}")
             return True
@@ -508,6 +911,27 @@ class EventNaming(seiscomp.client.Application):
             DM.Notifier.Disable()  # Make sure to disable notifier even if there's an error
             return False
 
+    def sendNotifications(self) -> bool:
+        """Send all queued notifiers as a single message"""
+        eventIDs, self._queuedEventIDs = self._queuedEventIDs, []
+        try:
+            msg = DM.Notifier.GetMessage()
+            if not msg:
+                return True
+
+            # Send notifications unless in test mode
+            if not self.test:
+                self.connection().send(msg)
+                logger.info(f"Sent database update notification for {len(eventIDs)} events")
+            else:
+                logger.info("Test mode - no database updates sent")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error sending database update notification, updates for "
+                         f"these events were not sent: {', '.join(eventIDs)}: {e}")
+            return False
+
 
 def main():
     """Main entry point with enhanced error handling"""
@@ -534,4 +958,6 @@ def main():
 if __name__ == "__main__":
     # Example usage:
     # python event_naming.py -E eventID -L locations.csv --direction-type detailed --max-distance 1000 --verbose
+    # python event_naming.py -E eventID1,eventID2 -L locations.csv
+    # python event_naming.py --eventID-file events.txt -L locations.csv
     sys.exit(main())
@@ -1,63 +1,107 @@
 import os
 import csv
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
 from obspy import read_inventory
 
-def check_sample_rates(inventory_folder):
-    results = []
-
-    # Iterate through all files in the folder
-    for filename in os.listdir(inventory_folder):
-        if filename.endswith(('.xml', '.XML')):  # Assuming inventory files are XML
-            file_path = os.path.join(inventory_folder, filename)
-            
-            # Read the inventory file
-            inv = read_inventory(file_path)
-
-            # Check each channel in the inventory
-            for network in inv:
-                for station in network:
-                    for channel in station:
-                        channel_id = f"{network.code}.{station.code}.{channel.location_code}.{channel.code}"
-                        sample_rate = channel.sample_rate
-                        
-                        results.append({
-                            'file': filename,
-                            'channel': channel_id,
-                            'sample_rate': sample_rate,
-                            'status': 'Zero' if sample_rate == 0 else 'Non-zero'
-                        })
-
-    return results
-
-def save_to_csv(results, output_file):
-    with open(output_file, 'w', newline='') as csvfile:
-        fieldnames = ['file', 'channel', 'sample_rate', 'status']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+STATIONXML_NS = '{http://www.fdsn.org/xml/station/1}'
+STATION_TAG = STATIONXML_NS + 'Station'
+CHANNEL_TAG = STATIONXML_NS + 'Channel'
+SAMPLE_RATE_TAG = STATIONXML_NS + 'SampleRate'
 
-        writer.writeheader()
-        for row in results:
-            writer.writerow(row)
+def _make_row(filename, channel_id, sample_rate):
+    return {
+        'file': filename,
+        'channel': channel_id,
+        'sample_rate': sample_rate,
+        'status': 'Zero' if sample_rate == 0 else 'Non-zero'
+    }
+
+def _fast_scan(file_path):
+    # Stream only the codes and sample rates out of FDSN StationXML, without
+    # building the responses. Returns None for other formats.
+    filename = os.path.basename(file_path)
+    rows = []
+    
+    context = etree.iterparse(file_path, events=('end',), tag=(STATION_TAG, CHANNEL_TAG))
+    for _, elem in context:
+        if elem.tag == CHANNEL_TAG:
+            station = elem.getparent()
+            network = station.getparent()
+            channel_id = f"{network.get('code')}.{station.get('code')}.{elem.get('locationCode', '')}.{elem.get('code')}"
+            sample_rate = elem.findtext(SAMPLE_RATE_TAG)
+            rows.append(_make_row(filename, channel_id, float(sample_rate) if sample_rate else None))
+        
+        # Drop processed elements to keep memory flat
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    
+    if not context.root.tag.startswith(STATIONXML_NS):
+        return None
+    return rows
+
+def _scan_one(file_path):
+    rows = _fast_scan(file_path)
+    if rows is not None:
+        return rows
+
+    rows = []
+    filename = os.path.basename(file_path)
+    
+    # Read the inventory file
+    inv = read_inventory(file_path)
+
+    # Check each channel in the inventory
+    for network in inv:
+        for station in network:
+            for channel in station:
+                channel_id = f"{network.code}.{station.code}.{channel.location_code}.{channel.code}"
+                rows.append(_make_row(filename, channel_id, channel.sample_rate))
+
+    return rows
+
+def iter_sample_rates(inventory_folder):
+    # Collect all inventory files in the folder
+    paths = [entry.path for entry in os.scandir(inventory_folder)
+             if entry.name.endswith(('.xml', '.XML'))]  # Assuming inventory files are XML
+
+    # Files are independent, so parse them on all cores and hand rows
+    # back as each file finishes instead of building one big list
+    with ProcessPoolExecutor() as executor:
+        for rows in executor.map(_scan_one, paths, chunksize=8):
+            yield from rows
 
 def main():
     inventory_folder = "./inventory"  # Replace with your folder path
     output_file = "sample_rate_report.csv"
 
-    results = check_sample_rates(inventory_folder)
+    total_count = 0
+    zero_results = []
+
+    # Write each row as it arrives; only the zero rows are kept for the report
+    with open(output_file, 'w', newline='') as csvfile:
+        fieldnames = ['file', 'channel', 'sample_rate', 'status']
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+
+        writer.writeheader()
+        for row in iter_sample_rates(inventory_folder):
+            writer.writerow(row)
+            total_count += 1
+            if row['status'] == 'Zero':
+                zero_results.append(row)
 
     # Print report to console
     print("Sample Rate Report:")
-    zero_count = sum(1 for r in results if r['status'] == 'Zero')
-    print(f"Total channels checked: {len(results)}")
+    zero_count = len(zero_results)
+    print(f"Total channels checked: {total_count}")
     print(f"Channels with zero sample rate: {zero_count}")
-    print(f"Channels with non-zero sample rate: {len(results) - zero_count}")
+    print(f"Channels with non-zero sample rate: {total_count - zero_count}")
     
     print("\nChannels with zero sample rate:")
-    for result in results:
-        if result['status'] == 'Zero':
-            print(f"File: {result['file']}, Channel: {result['channel']}")
+    for result in zero_results:
+        print(f"File: {result['file']}, Channel: {result['channel']}")
 
-    # Save results to CSV
-    save_to_csv(results, output_file)
     print(f"\nDetailed results saved to {output_file}")
 
 if __name__ == "__main__":